@@ -0,0 +1,112 @@
+""" Benchmarks for revlibs.connections, using the sqlite flavour.
+
+Run from the `connections` directory:
+
+    python benchmarks/bench_connections.py [--iterations N] [--threads N]
+
+Nothing outside this machine is needed, so the numbers can be compared
+between runs to spot regressions in the `get()` / config path.
+"""
+import argparse
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+_CONNECTION_NAME = "bench_sqlite"
+_CONNECTION_YAML = """\
+- name: {name}
+  flavour: sqlite
+  dsn: "{dsn}"
+"""
+
+
+def _setup(directory):
+    """ Point revlibs.connections at a single sqlite file database."""
+    dsn = Path(directory) / "bench.sqlite3"
+    with open(Path(directory) / "connections.yaml", "w") as f:
+        f.write(_CONNECTION_YAML.format(name=_CONNECTION_NAME, dsn=dsn))
+    os.environ["REVLIB_CONNECTIONS"] = directory
+
+
+def _timed(func, iterations):
+    """ Average seconds per call of `func`."""
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - start) / iterations
+
+
+def bench_config_load(iterations):
+    """ Cost of reading and resolving the connection settings."""
+    from revlibs.connections import config
+
+    return _timed(lambda: config.load(_CONNECTION_NAME), iterations)
+
+
+def bench_get(iterations):
+    """ Cost of a `get()` round trip running a trivial query."""
+    from revlibs.connections import get
+
+    def run():
+        with get(_CONNECTION_NAME) as conn:
+            conn.execute("SELECT 1").fetchone()
+
+    return _timed(run, iterations)
+
+
+def bench_concurrent_get(iterations, threads):
+    """ Queries per second with `threads` callers sharing the connection config."""
+    from revlibs.connections import get
+
+    def run(_):
+        with get(_CONNECTION_NAME) as conn:
+            conn.execute("SELECT 1").fetchone()
+
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        start = time.perf_counter()
+        list(pool.map(run, range(iterations)))
+        elapsed = time.perf_counter() - start
+    return iterations / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--threads", type=int, default=8)
+    args = parser.parse_args()
+
+    from revlibs import connections
+
+    with tempfile.TemporaryDirectory() as directory:
+        _setup(directory)
+        results = [
+            ("config.load", bench_config_load(args.iterations) * 1e6, "us/call"),
+            ("get (cold)", bench_get(args.iterations) * 1e6, "us/call"),
+            (
+                f"get (cold, {args.threads} threads)",
+                bench_concurrent_get(args.iterations, args.threads),
+                "calls/s",
+            ),
+        ]
+        connections.prewarm(_CONNECTION_NAME, size=args.threads)
+        try:
+            results += [
+                ("get (pre-warmed)", bench_get(args.iterations) * 1e6, "us/call"),
+                (
+                    f"get (pre-warmed, {args.threads} threads)",
+                    bench_concurrent_get(args.iterations, args.threads),
+                    "calls/s",
+                ),
+            ]
+        finally:
+            connections.stop_maintenance()
+
+    width = max(len(name) for name, *_ in results)
+    for name, value, unit in results:
+        print(f"{name:<{width}}  {value:>12.1f} {unit}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1 +1,2 @@
 from revlibs.connections.connectors import get
+from revlibs.connections.connectors import prewarm, start_maintenance, stop_maintenance
@@ -2,6 +2,7 @@
 import os
 import logging
 from pathlib import Path
+from types import MappingProxyType
 
 from revlibs.dicts import DictLoader
 
@@ -12,6 +13,7 @@ _PASSWORD_REQUIRED = (
     # Provide a meaningful message
     "Please ensure you have set the password as an environment variable"
 )
+_SECRET_MASK = "***"
 
 
 def load(database):
@@ -32,7 +34,17 @@ def load(database):
         logging.error(f"No config for db called: '%s'.", database)
         raise KeyError(f"Connection settings for '{database}' not found.")
 
-    return Config(database, db_config)
+    return Config(database, db_config).resolve()
+
+
+def _resolve(value):
+    """ Replace an `_env:VAR:default` placeholder by the env value."""
+    if isinstance(value, str) and value.startswith("_env"):
+        var_split = value.split(":", 2)
+        var_name = var_split[1]
+        var_default = "" if len(var_split) < 3 else var_split[2]
+        return os.environ.get(var_name, var_default)
+    return value
 
 
 class Config:
@@ -70,17 +82,109 @@ class Config:
 
     def __getattr__(self, key):
         """ Get attr from environment, if not set return default."""
+        if key == "config":
+            # Not initialised yet, e.g. while being unpickled.
+            raise AttributeError(key)
         if key not in self.config:
             raise NameError(f"Database flavour requires '{key}'.")
 
-        result = self.config[key]
-        if isinstance(result, str) and result.startswith("_env"):
-            var_split = result.split(":", 2)
-            var_name = var_split[1]
-            var_default = "" if len(var_split) < 3 else var_split[2]
-            result = os.environ.get(var_name, var_default)
+        return _resolve(self.config[key])
+
+    def resolve(self):
+        """ Snapshot the config with every env placeholder resolved."""
+        return ResolvedConfig(self)
+
+
+class ResolvedConfig:
+    """ Immutable connection config.
+
+    Env placeholders are resolved once, when the object is built, so
+    attribute access is a plain dict lookup and the object can be shared
+    between threads. Use `refresh` to pick up changes to the environment.
+    """
+
+    __slots__ = ("name", "_source", "_values")
+
+    def __init__(self, source):
+        values = {key: _resolve(value) for key, value in source.config.items()}
+        if "password" in values:
+            try:
+                values["password"] = source.password
+            except KeyError:
+                values["password"] = None
+        if "params" in values:
+            values["params"] = MappingProxyType(dict(values["params"]))
+        object.__setattr__(self, "name", source.name)
+        object.__setattr__(self, "_source", source)
+        object.__setattr__(self, "_values", MappingProxyType(values))
+
+    def __repr__(self):
+        """ Print the config like the connection file. Values taken
+        from the environment show their placeholder, the password is
+        masked.
+        """
+        values = {}
+        for key, value in self._values.items():
+            source = self._source.config[key]
+            if key == "password":
+                value = _SECRET_MASK
+            elif isinstance(source, str) and source.startswith("_env"):
+                value = source
+            values[key] = value
+        return f"ResolvedConfig({self.name!r}, {values!r})"
+
+    def __setattr__(self, key, value):
+        raise AttributeError(f"{type(self).__name__} is immutable.")
+
+    def __delattr__(self, key):
+        raise AttributeError(f"{type(self).__name__} is immutable.")
+
+    def __contains__(self, item):
+        """ Determine if config has an attr."""
+        return item in self._values
+
+    @property
+    def params(self):
+        """ Additional parameters to pass to the db connection."""
+        return self._values.get("params", MappingProxyType({}))
+
+    @property
+    def password(self):
+        """ Password, only if it was taken from the environment."""
+        result = self._values.get("password")
+        if result is None:
+            raise KeyError(_PASSWORD_REQUIRED)
         return result
 
+    def __getattr__(self, key):
+        """ Get a resolved attr."""
+        if key in ResolvedConfig.__slots__:
+            # Not initialised yet.
+            raise AttributeError(key)
+        try:
+            return self._values[key]
+        except KeyError:
+            raise NameError(f"Database flavour requires '{key}'.") from None
+
+    def refresh(self):
+        """ Resolve the env placeholders again into a new config."""
+        return ResolvedConfig(self._source)
+
+    def __copy__(self):
+        """ Immutable, so a copy is the same object."""
+        return self
+
+    def __deepcopy__(self, memo):
+        """ Immutable, so a copy is the same object."""
+        return self
+
+    def __reduce__(self):
+        """ Pickle the source config only, secrets are not pickled.
+
+        Unpickling resolves the env placeholders again.
+        """
+        return ResolvedConfig, (self._source,)
+
 
 def load_connection_settings():
     """ Retrieve connections from specified yaml."""
@@ -1,11 +1,13 @@
 """ Standard connection interface."""
 import logging
+import sqlite3
 from contextlib import contextmanager
 
 import psycopg2
 import pyexasol
 
 from revlibs.connections import config
+from revlibs.connections.pool import ConnectionPool
 
 log = logging.getLogger(__name__)
 
@@ -36,6 +38,19 @@ class ConnectExasol:
             log.exception(err)
         return self.connection
 
+    @property
+    def closed(self):
+        """ Determine if the connection has been closed."""
+        return self.connection.is_closed
+
+    def ping(self):
+        """ Run a trivial query to keep the session alive."""
+        self.connection.execute("SELECT 1")
+
+    def reset(self):
+        """ Roll back whatever the last user left uncommitted."""
+        self.connection.rollback()
+
     def close(self):
         """ Close the connection."""
         self.connection.close()
@@ -78,25 +93,137 @@ class ConnectPostgres:
                 continue
         return self.connection
 
+    @property
+    def closed(self):
+        """ Determine if the connection has been closed."""
+        return bool(self.connection.closed)
+
+    def ping(self):
+        """ Run a trivial query to keep the session alive."""
+        with self.connection.cursor() as cursor:
+            cursor.execute("SELECT 1")
+        self.connection.rollback()
+
+    def reset(self):
+        """ Roll back whatever the last user left uncommitted."""
+        self.connection.rollback()
+
     def close(self):
         """ Close the connection."""
         self.connection.close()
 
 
-_CONNECTORS = {"exasol": ConnectExasol, "postgres": ConnectPostgres}
+class ConnectSqlite:
+    """ Bridges method of connecting and sqlite.
 
+    Needs no server, which makes it handy for tests and benchmarks.
+    """
 
-@contextmanager
-def get(name):
-    """ Grab a connection."""
+    def __init__(self, cfg):
+        self.name = cfg.name
+        #: Path of the database file, or ':memory:'.
+        self.dsn = cfg.dsn
+        self.config = cfg
+
+    def connect(self):
+        """ Attempt to open the sqlite database."""
+        # Pooled connections are pinged from the maintenance thread.
+        params = {"check_same_thread": False}
+        params.update(self.config.params)
+        try:
+            self.connection = sqlite3.connect(self.dsn, **params)
+        except sqlite3.Error as err:
+            log.exception(err)
+        return self.connection
+
+    @property
+    def closed(self):
+        """ Determine if the connection has been closed."""
+        try:
+            self.connection.total_changes  # pylint: disable=pointless-statement
+        except sqlite3.ProgrammingError:
+            return True
+        return False
+
+    def ping(self):
+        """ Run a trivial query to check the connection."""
+        self.connection.execute("SELECT 1")
+
+    def reset(self):
+        """ Roll back whatever the last user left uncommitted."""
+        self.connection.rollback()
+
+    def close(self):
+        """ Close the connection."""
+        self.connection.close()
+
+
+_CONNECTORS = {"exasol": ConnectExasol, "postgres": ConnectPostgres, "sqlite": ConnectSqlite}
+
+
+def _connector(name):
+    """ Build the connector for a named connection."""
     cfg = config.load(name)
     try:
         obj = _CONNECTORS[cfg.flavour]
     except KeyError as err:
         log.exception(err, f"unsupported database {cfg.flavour}")
         raise
+    return obj(cfg)
+
+
+_POOL = ConnectionPool(_connector)
+
+
+def prewarm(names, size=1):
+    """ Connect ahead of time, so `get` can hand out an open connection.
+
+    Pre-warmed connections are rolled back and returned to the pool
+    instead of being closed when the `get` block exits, so commit
+    anything that should be kept. At most `size` connections are kept
+    per name, extra ones opened under load are closed on return.
+    """
+    if isinstance(names, str):
+        names = [names]
+    for name in names:
+        _POOL.prewarm(name, size)
 
-    connector = obj(cfg)
+
+def start_maintenance(interval=60.0):
+    """ Keep idle pre-warmed connections alive in a background thread.
+
+    Connections idle for `interval` seconds are pinged and replaced
+    if they turn out to be broken. The thread is stopped at exit.
+    """
+    _POOL.start(interval)
+
+
+def stop_maintenance():
+    """ Stop the maintenance thread and close pre-warmed connections."""
+    _POOL.stop()
+
+
+@contextmanager
+def get(name):
+    """ Grab a connection."""
+    if name in _POOL:
+        connector = _POOL.checkout(name)
+        try:
+            yield connector.connection
+        except BaseException:
+            _POOL.discard(connector)
+            raise
+        # The next user must not inherit an open transaction
+        try:
+            connector.reset()
+        except Exception as err:  # pylint: disable=broad-except
+            log.warning("Discarding connection '%s', rollback failed: %s", name, err)
+            _POOL.discard(connector)
+            return
+        _POOL.checkin(connector)
+        return
+
+    connector = _connector(name)
     if connector:
         yield connector.connect()
         connector.close()
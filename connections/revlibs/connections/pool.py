@@ -0,0 +1,164 @@
+""" Keeps pre-warmed connections ready to be checked out."""
+import atexit
+import logging
+import threading
+import time
+from collections import defaultdict, deque
+
+log = logging.getLogger(__name__)
+
+_DEFAULT_KEEPALIVE_INTERVAL = 60.0
+_DEFAULT_STOP_TIMEOUT = 10.0
+
+
+class ConnectionPool:
+    """ Idle connectors grouped by connection name.
+
+    Only names which have been pre-warmed are pooled, everything
+    else keeps the connect-on-use behaviour of `get`. At most the
+    pre-warmed number of connections is kept per name, extra ones
+    opened while the pool was empty are closed when returned.
+    """
+
+    def __init__(self, factory):
+        #: Builds an unconnected connector for a connection name.
+        self._factory = factory
+        #: name -> deque of (connector, monotonic time it became idle)
+        self._idle = defaultdict(deque)
+        #: name -> number of connections to keep
+        self._sizes = {}
+        #: name -> number of open connections, idle or checked out
+        self._open_count = defaultdict(int)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __contains__(self, name):
+        """ Determine if connections for `name` are pooled."""
+        return name in self._sizes
+
+    def _open(self, name):
+        """ Build and connect a fresh connector."""
+        connector = self._factory(name)
+        connector.connect()
+        with self._lock:
+            self._open_count[name] += 1
+        return connector
+
+    def _forget(self, connector):
+        """ Close a connector and stop counting it."""
+        with self._lock:
+            if self._open_count.get(connector.name):
+                self._open_count[connector.name] -= 1
+        _close_quietly(connector)
+
+    def prewarm(self, name, size=1):
+        """ Open `size` more connections for `name` and keep them idle."""
+        with self._lock:
+            self._sizes[name] = self._sizes.get(name, 0) + size
+        for _ in range(size):
+            self.checkin(self._open(name))
+
+    def checkout(self, name):
+        """ Take an idle connector, or connect a new one if there is none."""
+        broken = []
+        connector = None
+        with self._lock:
+            idle = self._idle[name]
+            while idle:
+                candidate, _ = idle.popleft()
+                if candidate.closed:
+                    broken.append(candidate)
+                    continue
+                connector = candidate
+                break
+        for candidate in broken:
+            self._forget(candidate)
+        return connector or self._open(name)
+
+    def checkin(self, connector):
+        """ Return a connector to the idle set, or close it if the pool is full."""
+        name = connector.name
+        with self._lock:
+            keep = name in self._sizes and self._open_count[name] <= self._sizes[name]
+            if keep:
+                self._idle[name].append((connector, time.monotonic()))
+        if not keep:
+            self._forget(connector)
+
+    def discard(self, connector):
+        """ Close a connector instead of returning it."""
+        self._forget(connector)
+
+    def maintain(self, interval=_DEFAULT_KEEPALIVE_INTERVAL):
+        """ Ping connectors idle for at least `interval` seconds and
+        replace those which fail.
+        """
+        now = time.monotonic()
+        due = []
+        with self._lock:
+            for name, idle in self._idle.items():
+                fresh = deque()
+                for entry in idle:
+                    (due if now - entry[1] >= interval else fresh).append(entry)
+                self._idle[name] = fresh
+
+        for connector, _ in due:
+            try:
+                connector.ping()
+            except Exception as err:  # pylint: disable=broad-except
+                log.warning("Replacing broken connection '%s': %s", connector.name, err)
+                self._forget(connector)
+                try:
+                    connector = self._open(connector.name)
+                except Exception as err:  # pylint: disable=broad-except
+                    log.error("Could not reconnect '%s': %s", connector.name, err)
+                    continue
+            self.checkin(connector)
+
+    def start(self, interval=_DEFAULT_KEEPALIVE_INTERVAL):
+        """ Run `maintain` every `interval` seconds in a daemon thread."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, args=(interval,), name="revlibs-connections-keepalive", daemon=True
+        )
+        self._thread.start()
+        atexit.unregister(self.stop)
+        atexit.register(self.stop)
+
+    def _run(self, interval):
+        while not self._stop.wait(interval):
+            try:
+                self.maintain(interval)
+            except Exception as err:  # pylint: disable=broad-except
+                log.exception(err)
+
+    def stop(self, timeout=_DEFAULT_STOP_TIMEOUT):
+        """ Stop the maintenance thread and close every idle connection.
+
+        Waits at most `timeout` seconds for a ping in progress, the
+        thread is a daemon and does not keep the process alive.
+        """
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+            if self._thread.is_alive():
+                log.warning("Connection maintenance did not stop within %s seconds", timeout)
+            self._thread = None
+        with self._lock:
+            idle = [connector for entries in self._idle.values() for connector, _ in entries]
+            self._idle.clear()
+            self._sizes.clear()
+            self._open_count.clear()
+        for connector in idle:
+            _close_quietly(connector)
+
+
+def _close_quietly(connector):
+    """ Close a connector which may already be broken."""
+    try:
+        connector.close()
+    except Exception as err:  # pylint: disable=broad-except
+        log.debug("Ignoring error while closing '%s': %s", connector.name, err)
@@ -9,7 +9,7 @@ setup(
     packages=find_packages(),
     python_requires=">=3.6",
     install_requires=[
-        "revlibs-dicts>=0.0.1",
+        "revlibs-dicts>=0.0.3",
         "revlibs-logger>=0.0.2",
         "psycopg2-binary>=2.8",
         "pyexasol>=0.5.2",
@@ -1,4 +1,6 @@
 """ Test configuration."""
+import copy
+import pickle
 from unittest.mock import patch
 
 import pytest
@@ -18,3 +20,61 @@ def test_password_fetched():
     """ Test config grabs password from env."""
     config = Config("test", {"password": "_env:GET_ME"})
     assert config.password == "wizards"
+
+
+@patch.dict("os.environ", {"GET_ME": "wizards", "DB_HOST": "localhost:5432"})
+def test_resolved_config():
+    """ Env placeholders are resolved once, when the config is built."""
+    config = Config(
+        "test", {"password": "_env:GET_ME", "dsn": "_env:DB_HOST", "user": "me"}
+    ).resolve()
+    with patch.dict("os.environ", {"GET_ME": "changed", "DB_HOST": "remote:5432"}):
+        assert config.password == "wizards"
+        assert config.dsn == "localhost:5432"
+        refreshed = config.refresh()
+    assert refreshed.password == "changed"
+    assert refreshed.dsn == "remote:5432"
+    assert "user" in config
+    assert "schema" not in config
+    with pytest.raises(NameError):
+        config.schema
+
+
+@patch.dict("os.environ", {"GET_ME": "wizards"})
+def test_resolved_config_immutable_and_masked():
+    """ Resolved config cannot be changed and hides the password."""
+    config = Config("test", {"password": "_env:GET_ME"}).resolve()
+    with pytest.raises(AttributeError):
+        config.user = "someone"
+    assert "wizards" not in repr(config)
+
+
+@patch.dict("os.environ", {"DB_USER": "admin", "DB_HOST": "secret-host:5432"})
+def test_resolved_config_repr_keeps_placeholders():
+    """ Values from the environment are not printed."""
+    config = Config("test", {"user": "_env:DB_USER", "dsn": "_env:DB_HOST", "schema": "s"})
+    text = repr(config.resolve())
+    assert "admin" not in text
+    assert "secret-host" not in text
+    assert "_env:DB_USER" in text
+    assert "'schema': 's'" in text
+
+
+@patch.dict("os.environ", {"GET_ME": "wizards"})
+def test_resolved_config_copy_and_pickle():
+    """ Resolved config can be copied and pickled without its secrets."""
+    config = Config("test", {"password": "_env:GET_ME", "params": {"a": 1}}).resolve()
+    assert copy.copy(config) is config
+    assert copy.deepcopy(config) is config
+    data = pickle.dumps(config)
+    assert b"wizards" not in data
+    restored = pickle.loads(data)
+    assert restored.password == "wizards"
+    assert restored.params == {"a": 1}
+
+
+def test_resolved_raise_password():
+    """ Resolved config still refuses passwords not taken from env."""
+    config = Config("test", {"password": "wizards"}).resolve()
+    with pytest.raises(KeyError):
+        config.password
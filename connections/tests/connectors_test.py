@@ -1,4 +1,5 @@
 """ Test connection library."""
+import sqlite3
 from pathlib import PurePath, Path
 from unittest.mock import patch
 from unittest.mock import call
@@ -85,3 +86,12 @@ def test_disabled_connection():
     with pytest.raises(KeyError):
         with get("postgres_disabled") as connection:
             assert not connection
+
+
+@patch.dict("os.environ", _TEST_EVIRONMENT)
+def test_sqlite():
+    """ Sqlite connections need no server."""
+    with get("sqlite_memory") as conn:
+        assert conn.execute("SELECT 1").fetchone() == (1,)
+    with pytest.raises(sqlite3.ProgrammingError):
+        conn.execute("SELECT 1")
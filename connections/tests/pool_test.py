@@ -0,0 +1,205 @@
+""" Test pre-warmed connections."""
+import threading
+import time
+from pathlib import PurePath
+from unittest.mock import patch
+from unittest.mock import MagicMock
+
+import pytest
+
+from revlibs.connections import get, prewarm, stop_maintenance
+from revlibs.connections.pool import ConnectionPool
+
+
+_TEST_CONNECTIONS = str(PurePath(__name__).parent / "resources" / "test_connections/")
+_TEST_EVIRONMENT = {"REVLIB_CONNECTIONS": _TEST_CONNECTIONS, "TEST_PASS": "IamAwizard"}
+
+
+class FakeConnector:
+    """ Connector which records how it was used."""
+
+    def __init__(self, name):
+        self.name = name
+        self.connection = MagicMock()
+        self.closed = False
+        self.pings = 0
+        self.broken = False
+
+    def connect(self):
+        return self.connection
+
+    def ping(self):
+        if self.broken:
+            raise ConnectionError("gone")
+        self.pings += 1
+
+    def reset(self):
+        self.connection.rollback()
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def pool():
+    pool = ConnectionPool(FakeConnector)
+    yield pool
+    pool.stop()
+
+
+def test_checkout_reuses_prewarmed(pool):
+    """ A pre-warmed connector is handed out instead of a new one."""
+    pool.prewarm("db")
+    warm = pool.checkout("db")
+    pool.checkin(warm)
+    assert pool.checkout("db") is warm
+
+
+def test_checkout_skips_closed(pool):
+    """ Closed connectors are never handed out."""
+    pool.prewarm("db")
+    broken = pool.checkout("db")
+    broken.closed = True
+    pool.checkin(broken)
+    assert pool.checkout("db") is not broken
+
+
+def test_maintain_pings_and_replaces(pool):
+    """ Idle connectors are pinged, broken ones replaced."""
+    pool.prewarm("db", size=2)
+    healthy, broken = pool.checkout("db"), pool.checkout("db")
+    broken.broken = True
+    pool.checkin(healthy)
+    pool.checkin(broken)
+
+    pool.maintain(interval=0)
+
+    assert healthy.pings == 1
+    assert broken.closed
+    remaining = [pool.checkout("db"), pool.checkout("db")]
+    assert healthy in remaining
+    assert broken not in remaining
+
+
+def test_checkin_caps_pool_size(pool):
+    """ Connections opened beyond the pre-warmed size are closed on return."""
+    pool.prewarm("db", size=1)
+    first, second = pool.checkout("db"), pool.checkout("db")
+    pool.checkin(first)
+    pool.checkin(second)
+    assert [first.closed, second.closed].count(True) == 1
+
+
+def test_maintain_does_not_grow_pool(pool):
+    """ Checkouts while maintenance pings do not leave extra connections."""
+    pool.prewarm("db", size=1)
+    warm = pool.checkout("db")
+    pool.checkin(warm)
+    checked_out = []
+    warm.ping = lambda: checked_out.append(pool.checkout("db"))
+
+    pool.maintain(interval=0)
+    pool.checkin(checked_out[0])
+
+    assert checked_out[0] is not warm
+    assert [warm.closed, checked_out[0].closed].count(True) == 1
+
+
+def test_stop_closes_idle(pool):
+    """ Stopping the pool closes everything it holds."""
+    pool.prewarm("db")
+    pool.start(interval=0.01)
+    connector = pool.checkout("db")
+    pool.checkin(connector)
+    pool.stop()
+    assert connector.closed
+    assert "db" not in pool
+
+
+def test_stop_does_not_wait_for_stuck_ping(pool):
+    """ A ping hanging on a dead session does not block stopping."""
+    pool.prewarm("db")
+    pinging, release = threading.Event(), threading.Event()
+    connector = pool.checkout("db")
+    connector.ping = lambda: (pinging.set(), release.wait())
+    pool.checkin(connector)
+    pool.start(interval=0.01)
+    assert pinging.wait(5)
+
+    start = time.monotonic()
+    pool.stop(timeout=0.1)
+    release.set()
+    assert time.monotonic() - start < 5
+
+
+@patch.dict("os.environ", _TEST_EVIRONMENT)
+def test_get_uses_prewarmed_postgres():
+    """ `get` hands out the pre-warmed connection and keeps it open."""
+    with patch("psycopg2.connect") as mocked_conn:
+        mocked_conn.return_value.closed = 0
+        prewarm("postgres_simple")
+        try:
+            with get("postgres_simple") as first:
+                pass
+            with get("postgres_simple") as second:
+                pass
+        finally:
+            stop_maintenance()
+
+    assert mocked_conn.call_count == 1
+    assert first is second
+    first.close.assert_called_once()
+
+
+@patch.dict("os.environ", _TEST_EVIRONMENT)
+def test_get_rolls_back_pooled_connection():
+    """ Uncommitted work is not visible to the next user of the connection."""
+    prewarm("sqlite_memory")
+    try:
+        with get("sqlite_memory") as first:
+            first.execute("CREATE TABLE t (x INTEGER)")
+            first.commit()
+            first.execute("INSERT INTO t VALUES (1)")
+        with get("sqlite_memory") as second:
+            assert not second.in_transaction
+            assert second.execute("SELECT COUNT(*) FROM t").fetchone() == (0,)
+    finally:
+        stop_maintenance()
+
+    assert first is second
+
+
+@patch.dict("os.environ", _TEST_EVIRONMENT)
+def test_get_discards_connection_failing_rollback():
+    """ A connection which cannot be rolled back is not reused."""
+    with patch("psycopg2.connect") as mocked_conn:
+        mocked_conn.return_value.closed = 0
+        mocked_conn.return_value.rollback.side_effect = Exception("server gone")
+        prewarm("postgres_simple")
+        try:
+            with get("postgres_simple"):
+                pass
+            with get("postgres_simple"):
+                pass
+        finally:
+            stop_maintenance()
+
+    assert mocked_conn.call_count == 2
+
+
+@patch.dict("os.environ", _TEST_EVIRONMENT)
+def test_get_discards_on_interrupt():
+    """ An interrupt inside `get` does not leak the pooled connection."""
+    prewarm("sqlite_memory")
+    try:
+        with pytest.raises(KeyboardInterrupt):
+            with get("sqlite_memory"):
+                raise KeyboardInterrupt
+        with get("sqlite_memory") as first:
+            pass
+        with get("sqlite_memory") as second:
+            pass
+    finally:
+        stop_maintenance()
+
+    assert first is second
@@ -7,7 +7,6 @@ from ruamel.yaml import YAML
 
 
 log = logging.getLogger(__name__)
-yaml = YAML()
 
 # Original location of the file.
 # To be used to hint the user for file location which contains a potential problem.
@@ -72,7 +71,8 @@ class DictLoader:
             fname = full_path.as_posix()
             contents = None
             if full_path.suffix in (".yaml", ".yml"):
-                contents = yaml.load_all(f)
+                # YAML instances keep parser state, so they cannot be shared between threads
+                contents = YAML().load_all(f)
             elif full_path.suffix == ".json":
                 contents = [json.load(f)]
             if contents:
@@ -2,7 +2,7 @@ from setuptools import setup, find_packages
 
 setup(
     name="revlibs-dicts",
-    version="0.0.2",
+    version="0.0.3",
     author="Demeter Sztanko",
     author_email="demeter.sztanko@revolut.com",
     py_modules=["revlibs.dicts"],
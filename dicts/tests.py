@@ -1,3 +1,4 @@
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 import tempfile
 import json
@@ -76,6 +77,18 @@ def test_load_dicts(generator, num_files, expected_size, extensions):
     tmp_dir.rmdir()
 
 
+def test_load_dicts_from_threads():
+    tmp_dir = create_dir(20, lambda i: [{"a": i}, {"a": i}], [("yaml", yaml.dump_all)])
+    with ThreadPoolExecutor(8) as executor:
+        sizes = list(
+            executor.map(lambda _: len(DictLoader.from_path(tmp_dir).items), range(200))
+        )
+    assert sizes == [2 * 20] * 200, "every thread loaded every dict"
+    for f in tmp_dir.iterdir():
+        f.unlink()
+    tmp_dir.rmdir()
+
+
 def test_to_dict_simple():
     a = [{"a": 1, PATH_KEY: "x"}]
     loader = DictLoader.from_dicts(a)
@@ -0,0 +1,83 @@
+"""
+Records per second for the revlibs.logger formatters.
+
+Run from the `logger` directory:
+
+    python benchmarks/bench_formatters.py [--records N]
+"""
+import argparse
+import json
+import logging
+import time
+
+from revlibs.logger.formatters.color_formatter import ColoredFormatter
+from revlibs.logger.formatters.json_formatter import JsonFormatter, orjson, supported_keys
+from revlibs.logger.formatters.stackdriver_formatter import serialize
+
+SIMPLE_FORMAT = "%(levelname)-8s\t%(pathname)s:%(lineno)d\t%(funcName)s\t%(asctime)s\t%(relativeCreated)6dms\t%(message)s"
+COLORED_FORMAT = "[%(asctime)s] %(colored_levelname)s %(pathname)s:%(lineno)d: %(message)s"
+
+
+class LegacyStackdriverFormatter(logging.Formatter):
+    """
+    The per-field `serialize()` approach StackdriverJsonFormatter used before JsonFormatter,
+    with the iteration fixed and the result dumped to JSON
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._keys = supported_keys()
+        self._environment = {"hostname": "bench", "user": "bench"}
+
+    def format(self, record):
+        record_dict = vars(record)
+        out = {k: serialize(v) for k, v in record_dict.items() if k in self._keys}
+        text = record_dict.get("message", "")
+        return json.dumps({"text": text, "params": out, "environment": self._environment})
+
+
+def make_record(with_extra=False):
+    record = logging.LogRecord(
+        "bench", logging.INFO, __file__, 42, "processed %d rows from %s", (1000, "table"), None
+    )
+    if with_extra:
+        record.request_id = "abc-123"
+        record.rows = [1, 2, 3]
+    return record
+
+
+def formatters():
+    yield "logging.Formatter (simple)", logging.Formatter(SIMPLE_FORMAT)
+    yield "ColoredFormatter", ColoredFormatter(COLORED_FORMAT)
+    yield "legacy Stackdriver serialize()", LegacyStackdriverFormatter()
+    yield "JsonFormatter (json)", JsonFormatter(use_orjson=False)
+    if orjson:
+        yield "JsonFormatter (orjson)", JsonFormatter()
+
+
+def records_per_second(formatter, records):
+    record = make_record(with_extra=True)
+    fmt = formatter.format
+    start = time.perf_counter()
+    for _ in range(records):
+        fmt(record)
+    return records / (time.perf_counter() - start)
+
+
+def run(records):
+    return [(name, records_per_second(formatter, records)) for name, formatter in formatters()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--records", type=int, default=100000)
+    args = parser.parse_args()
+
+    results = run(args.records)
+    width = max(len(name) for name, _ in results)
+    for name, rate in results:
+        print(f"{name:<{width}}  {rate:>12,.0f} records/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+"""
+Throughput and latency of the revlibs.logger logging path.
+
+Run from the `logger` directory:
+
+    python benchmarks/bench_logging.py [--records N] [--threads N] [--processes N] [--repeat N]
+    python benchmarks/bench_logging.py --save-baseline benchmarks/baseline.json
+    python benchmarks/bench_logging.py --compare benchmarks/baseline.json [--tolerance 0.2]
+
+Measures the cost of `get_logger()`, per-record latency and records/s for the console (colored),
+JSON and file handlers, both synchronous and queued, and with several threads and processes.
+`--compare` exits with 1 if a result is worse than the baseline by more than the tolerance.
+Baselines depend on the machine, compare only with a baseline saved on the same one.
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from logging.handlers import TimedRotatingFileHandler
+
+from bench_formatters import COLORED_FORMAT, SIMPLE_FORMAT
+from bench_formatters import run as run_formatters
+
+from revlibs.logger import get_logger, reconfigure
+from revlibs.logger.formatters.color_formatter import ColoredFormatter
+from revlibs.logger.formatters.json_formatter import JsonFormatter
+from revlibs.logger.handlers.queue_handler import BackgroundListener, BoundedQueueHandler
+from revlibs.logger.multiprocess import configure_worker, start_listener, stop_listener
+
+RATE = "records/s"
+MICROSECONDS = "us"
+
+
+def _file_handler(directory):
+    handler = TimedRotatingFileHandler(os.path.join(directory, "file.log"), when="h")
+    handler.setFormatter(logging.Formatter(SIMPLE_FORMAT))
+    return handler
+
+
+def _handlers(directory):
+    # A FileHandler closes its stream, a StreamHandler would leak it
+    console = logging.FileHandler(os.devnull)
+    console.setFormatter(ColoredFormatter(COLORED_FORMAT))
+    json_file = TimedRotatingFileHandler(os.path.join(directory, "json.log"), when="h")
+    json_file.setFormatter(JsonFormatter())
+    return {"console": console, "json": json_file, "file": _file_handler(directory)}
+
+
+class _Target:
+    """
+    A logger writing to `handler`, directly or through a bounded queue
+    """
+
+    def __init__(self, name, handler, queued):
+        self.logger = logging.Logger(name, logging.DEBUG)
+        self.listener = None
+        if queued:
+            queue_handler = BoundedQueueHandler(maxsize=10000)
+            self.listener = BackgroundListener(queue_handler, handler)
+            self.listener.start()
+            self.logger.addHandler(queue_handler)
+        else:
+            self.logger.addHandler(handler)
+
+    def finish(self):
+        """
+        Wait until every record is written
+        """
+        if self.listener:
+            self.listener.stop()
+        for handler in self.logger.handlers:
+            handler.flush()
+
+
+def bench_get_logger(directory, calls):
+    params = {"LOG_FILE_LOCATION": os.path.join(directory, "get_logger.log")}
+    start = time.perf_counter()
+    reconfigure(params=params)
+    configure = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(calls):
+        get_logger(__name__, params)
+    cached = (time.perf_counter() - start) / calls
+    return {
+        "get_logger configure": (configure * 1e6, MICROSECONDS),
+        "get_logger cached": (cached * 1e6, MICROSECONDS),
+    }
+
+
+def bench_handler(name, handler, queued, records):
+    """
+    Caller-side latency per record, records/s until everything is written
+    """
+    target = _Target(name, handler, queued)
+    info = target.logger.info
+    latencies = []
+    start = time.perf_counter()
+    for i in range(records):
+        before = time.perf_counter()
+        info("processed %d rows from %s", i, "table", extra={"request_id": "abc-123"})
+        latencies.append(time.perf_counter() - before)
+    target.finish()
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    mode = "queued" if queued else "sync"
+    return {
+        f"{name} {mode} throughput": (records / elapsed, RATE),
+        f"{name} {mode} latency p50": (latencies[len(latencies) // 2] * 1e6, MICROSECONDS),
+        f"{name} {mode} latency p99": (latencies[int(len(latencies) * 0.99)] * 1e6, MICROSECONDS),
+        f"{name} {mode} latency mean": (statistics.mean(latencies) * 1e6, MICROSECONDS),
+    }
+
+
+def bench_threads(handler, queued, records, threads):
+    target = _Target("threads", handler, queued)
+    per_thread = records // threads
+
+    def work():
+        for i in range(per_thread):
+            target.logger.info("thread message %d", i)
+
+    workers = [threading.Thread(target=work) for _ in range(threads)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    target.finish()
+    elapsed = time.perf_counter() - start
+
+    mode = "queued" if queued else "sync"
+    return {f"file {mode} {threads} threads throughput": (per_thread * threads / elapsed, RATE)}
+
+
+def _log_from_process(records):
+    log = get_logger("bench")
+    for i in range(records):
+        log.info("process message %d", i)
+
+
+def bench_processes(directory, records, processes):
+    params = {
+        "LOG_FILE_LOCATION": os.path.join(directory, "processes.log"),
+        "LOG_LEVEL_CONSOLE": "CRITICAL",
+    }
+    per_process = records // processes
+    queue = start_listener(params, forward=False)
+    start = time.perf_counter()
+    with multiprocessing.Pool(processes, initializer=configure_worker, initargs=(queue,)) as pool:
+        pool.map(_log_from_process, [per_process] * processes)
+    stop_listener()
+    elapsed = time.perf_counter() - start
+    return {
+        f"file {processes} processes throughput": (per_process * processes / elapsed, RATE)
+    }
+
+
+def run(records, threads, processes):
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        results.update(bench_get_logger(directory, records))
+        for name, rate in run_formatters(records):
+            results[f"format {name}"] = (rate, RATE)
+        for queued in (False, True):
+            for name, handler in _handlers(directory).items():
+                results.update(bench_handler(name, handler, queued, records))
+                handler.close()
+            handler = _file_handler(directory)
+            results.update(bench_threads(handler, queued, records, threads))
+            handler.close()
+        results.update(bench_processes(directory, records, processes))
+    return results
+
+
+def best_of(runs):
+    """
+    Best value of every result over several runs, to reduce noise
+    """
+    best = {}
+    for results in runs:
+        for name, (value, unit) in results.items():
+            if name not in best:
+                best[name] = (value, unit)
+            elif unit == RATE:
+                best[name] = (max(best[name][0], value), unit)
+            else:
+                best[name] = (min(best[name][0], value), unit)
+    return best
+
+
+def compare(results, baseline, tolerance):
+    """
+    Names of the results worse than the baseline by more than `tolerance`
+    """
+    regressions = []
+    for name, (value, unit) in results.items():
+        if name not in baseline or name.startswith("get_logger configure"):
+            continue
+        expected = baseline[name]["value"]
+        if unit == RATE:
+            worse = value < expected * (1 - tolerance)
+        else:
+            worse = value > expected * (1 + tolerance)
+        if worse:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--records", type=int, default=20000)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=3, help="report the best of N runs")
+    parser.add_argument("--save-baseline", metavar="PATH")
+    parser.add_argument("--compare", metavar="PATH")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    results = best_of(
+        run(args.records, args.threads, args.processes) for _ in range(args.repeat)
+    )
+
+    baseline = {}
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    width = max(len(name) for name in results)
+    for name, (value, unit) in results.items():
+        line = f"{name:<{width}}  {value:>14,.1f} {unit}"
+        if name in baseline:
+            line += f"  (baseline {baseline[name]['value']:,.1f})"
+        print(line)
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump({n: {"value": v, "unit": u} for n, (v, u) in results.items()}, f, indent=2)
+        print(f"Baseline saved to {args.save_baseline}")
+
+    if args.compare:
+        regressions = compare(results, baseline, args.tolerance)
+        for name in regressions:
+            print(f"REGRESSION: {name}", file=sys.stderr)
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,25 @@
 from typing import Optional, Union
 
+import atexit
 import logging
 import logging.config
+import threading
 
+from collections import ChainMap
+from functools import lru_cache
 from os import environ, _Environ
 from pathlib import Path
 from pkgutil import get_data
 
+from string import Formatter
+
 import yaml
 
+from .filters.rate_limit_filter import RateLimitFilter, flush_summaries
 from .formatters import color_formatter
 from .formatters import stackdriver_formatter
+from .handlers.queue_handler import BoundedQueueHandler, BackgroundListener
+from .handlers.rotation import compress_rotated_files
 
 DEFAULTS = {
     "LOG_FILE_LOCATION": "/tmp/python-log.log",
@@ -18,47 +27,223 @@ DEFAULTS = {
     # "APP_NAME": "Python application",
     "LOG_LEVEL_CONSOLE": "INFO",
     "LOG_LEVEL_FILE": "DEBUG",
+    "LOG_FORMAT_FILE": "simple",
+    "LOG_RATE_LIMIT": "0",
+    "LOG_RATE_LIMIT_BURST": "0",
+    "LOG_SAMPLE_RATES": "",
+    "LOG_DEDUPE_INTERVAL": "0",
     "LOG_SLACK_USER": "Logger",
     "DEFAULT_SLACK_CHANNEL": "NOT_SET",
     "LOG_SLACK_TOKEN": "NOT_SET",  # This should be overriden, otherwise message will not be sent
+    "LOG_ASYNC": "FALSE",
+    "LOG_QUEUE_SIZE": "10000",
+    "LOG_QUEUE_OVERFLOW": "block",
+    "LOG_QUEUE_DROP_LEVEL": "INFO",
 }
 
 STACKDRIVER_LOGGING_ENABLE_VAR = "STACKDRIVER_LOGGING_ENABLE"
+LOG_ASYNC_VAR = "LOG_ASYNC"
+LOG_ROTATE_COMPRESS_VAR = "LOG_ROTATE_COMPRESS"
+
+# Params which change the configuration without appearing in logging.yaml
+_CONTROL_VARS = (
+    STACKDRIVER_LOGGING_ENABLE_VAR,
+    LOG_ASYNC_VAR,
+    LOG_ROTATE_COMPRESS_VAR,
+    "LOG_QUEUE_SIZE",
+    "LOG_QUEUE_OVERFLOW",
+    "LOG_QUEUE_DROP_LEVEL",
+    *stackdriver_formatter.DEFAULTS,
+)
+
+_listeners = []
+# Handlers this module added, the only ones `_forward_only` removes
+_installed = set()
+_configure_lock = threading.Lock()
+_configured_key = None
+# Configuration key of a process which only forwards records to a listener process
+_FORWARDING = object()
 
 
 LOGGING_CONFIG_LOCATION = environ.get("LOG_CONFIG_PATH")
 
 
+@lru_cache(maxsize=None)
+def _read_logging_template_(path: Optional[str]) -> str:
+    if path:
+        with open(path) as f:
+            return f.read()
+    config_data = get_data("revlibs.logger", "resources/logging.yaml")
+    if config_data:
+        return config_data.decode("utf-8")
+    raise Exception("Coould not find default logging.yaml")
+
+
+@lru_cache(maxsize=None)
+def _template_fields_(config_str: str) -> tuple:
+    fields = {field for _, field, _, _ in Formatter().parse(config_str) if field}
+    return tuple(sorted(fields.union(_CONTROL_VARS)))
+
+
+def _config_key_(params):
+    """
+    Identifies a configuration: the template location and the effective value of every
+    param it depends on. Unrelated environment variables do not matter.
+    """
+    fields = _template_fields_(_read_logging_template_(LOGGING_CONFIG_LOCATION))
+    # Runs on every get_logger call, avoid ChainMap lookups
+    get, default = params.get, DEFAULTS.get
+    return (LOGGING_CONFIG_LOCATION, tuple([get(k, default(k)) for k in fields]))
+
+
 def _load_logging_config_(params):
+    config_str = _read_logging_template_(LOGGING_CONFIG_LOCATION)
+    return yaml.load(config_str.format_map(ChainMap(params, DEFAULTS)), Loader=yaml.Loader)
 
-    params.update({k: v for k, v in DEFAULTS.items() if k not in params})
 
-    if LOGGING_CONFIG_LOCATION:
-        with open(LOGGING_CONFIG_LOCATION) as f:
-            config_str = f.read()
-    else:
-        config_data = get_data("revlibs.logger", "resources/logging.yaml")
-        if config_data:
-            config_str = config_data.decode("utf-8")
-        else:
-            raise Exception("Coould not find default logging.yaml")
-    return yaml.load(config_str.format(**params), Loader=yaml.Loader)
+def _enable_async(loggers, params):
+    """
+    Move the handlers of `loggers` behind a bounded queue, drained by a background listener
+    """
+    for log in loggers:
+        if not log.handlers:
+            continue
+        queue_handler = BoundedQueueHandler(
+            maxsize=int(params.get("LOG_QUEUE_SIZE", DEFAULTS["LOG_QUEUE_SIZE"])),
+            overflow=params.get("LOG_QUEUE_OVERFLOW", DEFAULTS["LOG_QUEUE_OVERFLOW"]),
+            drop_level=logging.getLevelName(
+                params.get("LOG_QUEUE_DROP_LEVEL", DEFAULTS["LOG_QUEUE_DROP_LEVEL"])
+            ),
+        )
+        listener = BackgroundListener(queue_handler, *log.handlers)
+        log.handlers = [queue_handler]
+        listener.start()
+        _listeners.append((log, queue_handler, listener))
+
+
+def shutdown():
+    """
+    Stop the background listeners started in async mode, writing out every queued record.
+    Loggers write to their handlers directly again, until async mode is configured on the next
+    `get_logger` call. Registered to run at exit.
+    """
+    global _configured_key
+
+    if _listeners:
+        _configured_key = None
+    while _listeners:
+        log, queue_handler, listener = _listeners.pop()
+        # Nothing would drain the queue of a logger held from before, put its handlers back first
+        if queue_handler in log.handlers:
+            log.removeHandler(queue_handler)
+            for handler in listener.handlers:
+                log.addHandler(handler)
+        listener.stop()
+
+
+atexit.register(shutdown)
+
+
+def _configure(params, key, disable_existing_loggers=True):
+    global _configured_key
+
+    # The old listeners and filters write to handlers that dictConfig is about to close
+    flush_summaries()
+    shutdown()
+    config = _load_logging_config_(params)
+    if not disable_existing_loggers:
+        config["disable_existing_loggers"] = False
+    logging.config.dictConfig(config)
+    root = logging.getLogger()
+
+    if params.get(LOG_ROTATE_COMPRESS_VAR, "FALSE").upper() == "TRUE":
+        compress_rotated_files(root.handlers)
+
+    if params.get(STACKDRIVER_LOGGING_ENABLE_VAR, "FALSE").upper() == "TRUE":
+        root.info("STACKDRIVER enabled")
+        # Share the filters of the configured handlers, e.g. rate limiting
+        filters = {f for handler in root.handlers for f in handler.filters}
+        stackdriver_formatter.add_stack_driver_support(root, params, filters)
+
+    loggers = [root] + [logging.getLogger(n) for n in config.get("loggers", {})]
+    # Summaries of suppressed records go to the handlers which suppressed them
+    for log in loggers:
+        for handler in log.handlers:
+            for log_filter in handler.filters:
+                if isinstance(log_filter, RateLimitFilter):
+                    log_filter.attach(handler)
+
+    _installed.clear()
+    _installed.update(h for log in loggers for h in log.handlers)
+    if params.get(LOG_ASYNC_VAR, "FALSE").upper() == "TRUE":
+        _enable_async(loggers, params)
+        _installed.update(h for log in loggers for h in log.handlers)
+
+    _configured_key = key
 
 
 def get_logger(name=None, params: Union[dict, _Environ] = None):
     """
     Initialise the logger using the logging.yaml template
     Use environ() where no parameters are specified
+    Logging is only configured again if the template location or the params it uses have changed,
+    otherwise this is just `logging.getLogger(name)`
     """
+    if _configured_key is _FORWARDING:
+        return logging.getLogger(name)
     if not params:
         params = environ
 
-    config = _load_logging_config_(params)
-    logging.config.dictConfig(config)
-    log = logging.getLogger(name)
+    key = _config_key_(params)
+    if key != _configured_key:
+        with _configure_lock:
+            if key != _configured_key:
+                # Loggers handed out before, e.g. at import time, must keep working
+                _configure(params, key, disable_existing_loggers=False)
+    return logging.getLogger(name)
 
-    if params.get(STACKDRIVER_LOGGING_ENABLE_VAR, "FALSE").upper() == "TRUE":
-        log.info("STACKDRIVER enabled")
-        stackdriver_formatter.add_stack_driver_support(log)
 
-    return log
+def _forward_only(handler: Optional[logging.Handler]):
+    """
+    Replace the handlers this module installed in this process by `handler`, see `multiprocess`.
+    Handlers added by the application stay. `get_logger` keeps this configuration,
+    `reconfigure` does not.
+    Without a handler, logging is configured locally again on the next `get_logger` call.
+    """
+    global _configured_key
+
+    with _configure_lock:
+        shutdown()
+        loggers = [logging.getLogger()] + [
+            log for log in logging.root.manager.loggerDict.values() if isinstance(log, logging.Logger)
+        ]
+        for log in loggers:
+            for old in list(log.handlers):
+                if old in _installed:
+                    log.removeHandler(old)
+        _installed.clear()
+        if handler is None:
+            _configured_key = None
+            return
+        root = logging.getLogger()
+        root.addHandler(handler)
+        root.setLevel(logging.NOTSET)
+        _installed.add(handler)
+        _configured_key = _FORWARDING
+
+
+def reconfigure(
+    name=None, params: Union[dict, _Environ] = None, disable_existing_loggers: bool = True
+):
+    """
+    Configure logging again, even if nothing has changed. Re-reads logging.yaml.
+    Loggers created before and not listed in logging.yaml are disabled, unless
+    `disable_existing_loggers` is False.
+    """
+    if not params:
+        params = environ
+
+    _read_logging_template_.cache_clear()
+    with _configure_lock:
+        _configure(params, _config_key_(params), disable_existing_loggers)
+    return logging.getLogger(name)
@@ -0,0 +1,211 @@
+from typing import Dict, List, Optional, Union
+
+import atexit
+import logging
+import random
+import threading
+import time
+import weakref
+from collections import OrderedDict
+
+_filters = weakref.WeakSet()
+
+
+def parse_sample_rates(sample: Union[str, Dict[str, float], None]) -> Dict[int, float]:
+    """
+    Level -> probability of keeping a record, from a dict or a `"DEBUG=0.1,INFO=0.5"` string
+    """
+    if not sample:
+        return {}
+    if isinstance(sample, str):
+        sample = dict(item.split("=", 1) for item in sample.split(",") if item.strip())
+    return {logging.getLevelName(level.strip().upper()): float(p) for level, p in sample.items()}
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Keeps a single failing code path from flooding the handlers:
+
+    - `rate`: records per second allowed from each call site (file and line), with bursts
+      of up to `burst` records. A token bucket per call site. 0 disables it
+    - `sample`: probability of keeping a record, per level. Levels not listed are always kept
+    - `dedupe_interval`: identical messages from the same call site are let through once
+      per interval. 0 disables it
+
+    Suppressed records are counted, the next record let through from the same call site
+    gets " (suppressed N similar)" appended and the count in its `suppressed` attribute.
+    A call site which stays quiet gets a summary record instead, like the last suppressed
+    record with the same suffix, once its count is `summary_interval` seconds old
+    (the dedupe interval or 1 second by default). Summaries are checked for on every record
+    and written by `flush`. At most `max_keys` call sites and messages are tracked, the least
+    recently seen are forgotten, after a summary of their count.
+
+    The same instance can be shared between handlers, a record is only evaluated once.
+    Summaries go to the handlers passed to `attach`, or to the logger of the suppressed record.
+    """
+
+    def __init__(
+        self,
+        rate: float = 0,
+        burst: float = 0,
+        sample: Union[str, Dict[str, float], None] = None,
+        dedupe_interval: float = 0,
+        max_keys: int = 1000,
+        summary_interval: float = 0,
+    ):
+        super().__init__()
+        self.rate = float(rate)
+        self.burst = float(burst) or max(self.rate, 1.0)
+        self.sample = parse_sample_rates(sample)
+        self.dedupe_interval = float(dedupe_interval)
+        self.max_keys = max_keys
+        self.enabled = bool(self.rate or self.sample or self.dedupe_interval)
+        self.summary_interval = float(summary_interval) or self.dedupe_interval or 1.0
+        # call site -> [tokens, last refill, suppressed count, time of the first suppression,
+        #               last suppressed record as (name, level, pathname, lineno, func, msg, args)]
+        self._sites: Dict[tuple, list] = OrderedDict()
+        # (call site, message) -> time it was last let through
+        self._messages: Dict[tuple, float] = OrderedDict()
+        self._next_summary = 0.0
+        self._handlers: List[logging.Handler] = []
+        self._lock = threading.Lock()
+        # Last record seen by the thread and the decision taken for it,
+        # and whether the thread is writing summaries
+        self._last = threading.local()
+        _filters.add(self)
+
+    def attach(self, handler: logging.Handler):
+        """
+        Write summaries to `handler`, the filter should be one of its filters
+        """
+        if handler not in self._handlers:
+            self._handlers.append(handler)
+
+    def _track(self, table: OrderedDict, key, default, forgotten: Optional[list] = None):
+        # Called with self._lock held
+        entry = table.get(key)
+        if entry is None:
+            entry = table[key] = default
+            if len(table) > self.max_keys:
+                _, oldest = table.popitem(last=False)
+                if forgotten is not None:
+                    forgotten.append(oldest)
+        else:
+            table.move_to_end(key)
+        return entry
+
+    def _take_counts(self, sites, now: Optional[float] = None) -> list:
+        # Called with self._lock held. Counts of `sites` older than summary_interval, or all of them
+        counts = []
+        for site in sites:
+            if site[2] and (now is None or now - site[3] >= self.summary_interval):
+                counts.append((site[2], site[4]))
+                site[2], site[4] = 0, None
+        return counts
+
+    def _write_summaries(self, counts: list):
+        last = self._last
+        last.summarising = True
+        try:
+            for suppressed, (name, level, pathname, lineno, func, msg, args) in counts:
+                summary = logging.LogRecord(
+                    name, level, pathname, lineno, f"{msg} (suppressed {suppressed} similar)",
+                    args, None, func,
+                )
+                summary.suppressed = suppressed
+                if not self._handlers:
+                    logging.getLogger(name).handle(summary)
+                for handler in self._handlers:
+                    if level >= handler.level:
+                        handler.handle(summary)
+        finally:
+            last.summarising = False
+
+    def flush(self):
+        """
+        Write a summary for every call site with suppressed records
+        """
+        with self._lock:
+            counts = self._take_counts(self._sites.values())
+        self._write_summaries(counts)
+
+    def _allow(self, record: logging.LogRecord, now: float, site: list) -> bool:
+        # Called with self._lock held
+        if self.dedupe_interval:
+            key = (record.pathname, record.lineno, record.getMessage())
+            last_seen = self._messages.get(key)
+            if last_seen is not None and now - last_seen < self.dedupe_interval:
+                return False
+            self._track(self._messages, key, now)
+            self._messages[key] = now
+
+        if self.rate:
+            tokens, last_refill = site[0], site[1]
+            tokens = min(self.burst, tokens + (now - last_refill) * self.rate)
+            site[1] = now
+            if tokens < 1:
+                site[0] = tokens
+                return False
+            site[0] = tokens - 1
+        return True
+
+    def _decide(self, record: logging.LogRecord) -> bool:
+        probability = self.sample.get(record.levelno)
+        if probability is not None and random.random() >= probability:
+            return False
+        if not (self.rate or self.dedupe_interval):
+            return True
+
+        now = time.monotonic()
+        forgotten = []
+        with self._lock:
+            site = self._track(
+                self._sites, (record.pathname, record.lineno), [self.burst, now, 0, now, None],
+                forgotten,
+            )
+            allowed = self._allow(record, now, site)
+            suppressed = 0
+            if not allowed:
+                if not site[2]:
+                    site[3] = now
+                site[2] += 1
+                site[4] = (
+                    record.name, record.levelno, record.pathname, record.lineno,
+                    record.funcName, record.msg, record.args,
+                )
+            else:
+                suppressed, site[2], site[4] = site[2], 0, None
+            counts = self._take_counts(forgotten)
+            if now >= self._next_summary:
+                self._next_summary = now + self.summary_interval
+                counts += self._take_counts(self._sites.values(), now)
+
+        if counts:
+            self._write_summaries(counts)
+        if suppressed:
+            record.suppressed = suppressed
+            record.msg = f"{record.msg} (suppressed {suppressed} similar)"
+        return allowed
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not self.enabled:
+            return True
+        last = self._last
+        if getattr(last, "summarising", False):
+            return True
+        if getattr(last, "record", None) is record:
+            return last.decision
+        decision = self._decide(record)
+        last.record, last.decision = record, decision
+        return decision
+
+
+def flush_summaries():
+    """
+    Write the pending summaries of every rate limit filter. Registered to run at exit.
+    """
+    for rate_limit in list(_filters):
+        rate_limit.flush()
+
+
+atexit.register(flush_summaries)
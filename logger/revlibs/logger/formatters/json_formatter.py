@@ -0,0 +1,152 @@
+from typing import Callable, Dict, Iterable, List, Optional
+
+import json
+import logging
+import os
+import socket
+from datetime import date, datetime, time
+from enum import Enum
+from pkgutil import get_data
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def supported_keys() -> List[str]:
+    """
+    Get supported keys from the package resources
+    """
+    data = get_data("revlibs.logger", "resources/supported_keys")
+    if data:
+        return data.decode("utf-8").splitlines()
+    return []
+
+
+def environment_info() -> dict:
+    return {"hostname": socket.gethostname(), "user": os.environ.get("USER", "")}
+
+
+# Attributes every LogRecord has, anything else was passed with `extra=`
+_RECORD_ATTRIBUTES = frozenset(
+    vars(logging.LogRecord("", logging.INFO, "", 0, "", None, None))
+).union({"message", "asctime", "colored_levelname"})
+
+
+def _iso(value):
+    return value.isoformat()
+
+
+def _enum_value(value):
+    return value.value
+
+
+def _bytes_text(value):
+    return value.decode("utf-8", "replace")
+
+
+def _resolve_serializer(value_type: type) -> Callable:
+    if issubclass(value_type, (datetime, date, time)):
+        return _iso
+    if issubclass(value_type, Enum):
+        return _enum_value
+    if issubclass(value_type, (set, frozenset)):
+        return list
+    if issubclass(value_type, (bytes, bytearray)):
+        return _bytes_text
+    return str
+
+
+_MAX_DEPTH = 32
+
+
+def _json_safe(value, default: Callable, depth: int = 0):
+    """
+    Copy of `value` any JSON encoder can write: string keys, no cycles, bounded depth
+    """
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    if depth >= _MAX_DEPTH:
+        return str(value)
+    if isinstance(value, dict):
+        return {
+            k if isinstance(k, str) else str(k): _json_safe(v, default, depth + 1)
+            for k, v in value.items()
+        }
+    if isinstance(value, (list, tuple)):
+        return [_json_safe(v, default, depth + 1) for v in value]
+    return _json_safe(default(value), default, depth + 1)
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Formats a record as a single JSON line:
+    `{"text": ..., "params": {...}, "extra": {...}, "environment": {...}}`
+
+    `params` holds the record attributes listed in `keys` (resources/supported_keys by default),
+    `extra` the fields passed with `extra=`. Uses orjson if it is installed.
+    Values JSON can not represent are converted by a serializer chosen once per type.
+    Records the encoder still rejects, e.g. integers above 64 bits with orjson or
+    non-string keys with json, are written with every key and value converted to text.
+    """
+
+    def __init__(
+        self,
+        keys: Optional[Iterable[str]] = None,
+        datefmt: Optional[str] = None,
+        use_orjson: bool = True,
+    ):
+        super().__init__(datefmt=datefmt)
+        self._keys = tuple(supported_keys() if keys is None else keys)
+        self._needs_asctime = "asctime" in self._keys
+        self._environment = environment_info()
+        # How to serialize each non-JSON value type, resolved on first sight
+        self._serializers: Dict[type, Callable] = {}
+        if use_orjson and orjson:
+            self._dumps = self._orjson_dumps
+        else:
+            self._dumps = json.JSONEncoder(default=self._default).encode
+
+    def _default(self, value):
+        value_type = type(value)
+        serializer = self._serializers.get(value_type)
+        if serializer is None:
+            serializer = self._serializers[value_type] = _resolve_serializer(value_type)
+        return serializer(value)
+
+    def _orjson_dumps(self, obj) -> str:
+        return orjson.dumps(obj, default=self._default, option=orjson.OPT_NON_STR_KEYS).decode(
+            "utf-8"
+        )
+
+    def to_dict(self, record: logging.LogRecord) -> dict:
+        record.message = record.getMessage()
+        if self._needs_asctime:
+            record.asctime = self.formatTime(record, self.datefmt)
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+
+        fields = vars(record)
+        out = {
+            "text": record.message,
+            "params": {k: fields[k] for k in self._keys if k in fields},
+            "environment": self._environment,
+        }
+        extra = {k: v for k, v in fields.items() if k not in _RECORD_ATTRIBUTES}
+        if extra:
+            out["extra"] = extra
+        return out
+
+    def to_json_dict(self, record: logging.LogRecord) -> dict:
+        """
+        `to_dict` with only keys and values JSON can represent, for APIs taking structured payloads
+        """
+        return _json_safe(self.to_dict(record), self._default)
+
+    def format(self, record: logging.LogRecord) -> str:
+        out = self.to_dict(record)
+        try:
+            return self._dumps(out)
+        except (TypeError, ValueError):
+            return json.dumps(_json_safe(out, self._default))
@@ -1,52 +1,28 @@
-from typing import List
+from ..handlers.stackdriver_handler import StackdriverBatchHandler, make_transport
+from .json_formatter import JsonFormatter, environment_info, supported_keys
 
-import logging
-import socket
-import os
-from pkgutil import get_data
+DEFAULTS = {
+    "STACKDRIVER_TRANSPORT": "cloud",
+    "STACKDRIVER_BATCH_SIZE": "500",
+    "STACKDRIVER_FLUSH_INTERVAL": "5",
+    "STACKDRIVER_MAX_BUFFER": "10000",
+}
 
-from google.cloud.logging.handlers import CloudLoggingHandler
-from google.cloud.logging import Client
 
-
-def supported_keys() -> List[str]:
-    """
-    Get supported keys from the package resources
-    """
-    data = get_data("logger", "resources/supported_keys")
-    if data:
-        return data.decode("utf-8").splitlines()
-
-
-class StackdriverJsonFormatter(logging.Formatter):
+class StackdriverJsonFormatter(JsonFormatter):
     """
-    Creates a `dict` to send a JSON object to StackDriver
+    Creates a JSON line to send to StackDriver, populating only the fields specified in
+    resources/supported_keys. Apart from this, some variables on execution environment are added as well
     """
 
     _SUPPORTED_KEYS_ = supported_keys()
 
     def __init__(self):
-        """
-        Adds app environment info to the logger
-        """
-        super().__init__()
-        self._enviroment_info_ = StackdriverJsonFormatter.environment_info()
+        super().__init__(keys=StackdriverJsonFormatter._SUPPORTED_KEYS_)
 
     @staticmethod
     def environment_info():
-        return {"hostname": socket.gethostname(), "user": os.environ.get("USER", "")}
-
-    def format(self, record):
-        """
-        Creates dict out of the records, by populating only the fields specified in resources/supported_keys
-        Apart from this, some variables on execution environment are added as well
-        """
-        record_dict = vars(record)
-        text = record_dict.get("message", "")
-
-        out = {k: serialize(v) for k, v in record_dict if k in self._SUPPORTED_KEYS_}
-
-        return {"text": text, "params": out, "environment": self._enviroment_info_}
+        return environment_info()
 
 
 def serialize(obj):
@@ -65,8 +41,19 @@ def serialize(obj):
     return str(obj)
 
 
-def add_stack_driver_support(log):
-    client = Client()
-    handler = client.get_default_handler()
+def add_stack_driver_support(log, params=None, filters=()):
+    """
+    Adds a batching Stackdriver handler to `log`. Batching and the transport
+    can be tuned with the STACKDRIVER_* params, see DEFAULTS
+    """
+    params = {**DEFAULTS, **{k: v for k, v in (params or {}).items() if k in DEFAULTS}}
+    handler = StackdriverBatchHandler(
+        make_transport(params["STACKDRIVER_TRANSPORT"]),
+        batch_size=int(params["STACKDRIVER_BATCH_SIZE"]),
+        flush_interval=float(params["STACKDRIVER_FLUSH_INTERVAL"]),
+        max_buffer=int(params["STACKDRIVER_MAX_BUFFER"]),
+    )
     handler.setFormatter(StackdriverJsonFormatter())
+    for f in filters:
+        handler.addFilter(f)
     log.addHandler(handler)
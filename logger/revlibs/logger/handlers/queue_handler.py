@@ -0,0 +1,80 @@
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+
+BLOCK = "block"
+DROP_OLDEST = "drop_oldest"
+DROP_LEVEL = "drop_level"
+OVERFLOW_POLICIES = (BLOCK, DROP_OLDEST, DROP_LEVEL)
+
+
+class BoundedQueueHandler(QueueHandler):
+    """
+    Puts records on a bounded queue, to be written by a `BackgroundListener`.
+    What happens when the queue is full depends on `overflow`:
+
+    - block: wait for the listener to make room
+    - drop_oldest: discard the oldest queued record
+    - drop_level: discard records at or below `drop_level`, wait for the others
+    """
+
+    def __init__(self, maxsize: int = 10000, overflow: str = BLOCK, drop_level: int = logging.INFO):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy {overflow}, use one of {OVERFLOW_POLICIES}")
+        super().__init__(queue.Queue(maxsize))
+        self.overflow = overflow
+        self.drop_level = drop_level
+        #: Number of records discarded because the queue was full
+        self.dropped = 0
+
+    def enqueue(self, record):
+        # Called from `handle`, under the handler lock
+        if self.overflow == BLOCK:
+            self.queue.put(record)
+            return
+        try:
+            self.queue.put_nowait(record)
+            return
+        except queue.Full:
+            pass
+
+        if self.overflow == DROP_LEVEL:
+            if record.levelno <= self.drop_level:
+                self.dropped += 1
+            else:
+                self.queue.put(record)
+            return
+
+        while True:
+            try:
+                self.queue.get_nowait()
+                self.dropped += 1
+            except queue.Empty:
+                pass
+            try:
+                self.queue.put_nowait(record)
+                return
+            except queue.Full:
+                continue
+
+
+class BackgroundListener(QueueListener):
+    """
+    Drains a `BoundedQueueHandler` queue into the real handlers, in a background thread
+    """
+
+    def __init__(self, queue_handler: BoundedQueueHandler, *handlers):
+        super().__init__(queue_handler.queue, *handlers, respect_handler_level=True)
+
+    def enqueue_sentinel(self):
+        # The queue may be full, wait for room rather than failing to stop
+        self.queue.put(self._sentinel)
+
+    def stop(self):
+        """
+        Write out everything still queued, then stop the thread
+        """
+        if self._thread:
+            super().stop()
+        for handler in self.handlers:
+            handler.flush()
@@ -0,0 +1,36 @@
+import gzip
+import os
+import shutil
+import threading
+from logging.handlers import BaseRotatingHandler
+
+
+def gzip_namer(name: str) -> str:
+    return name + ".gz"
+
+
+def _compress(source: str, dest: str):
+    with open(source, "rb") as f_in, gzip.open(dest, "wb") as f_out:
+        shutil.copyfileobj(f_in, f_out)
+    os.remove(source)
+
+
+def background_gzip_rotator(source: str, dest: str):
+    """
+    Rotator for rotating file handlers. Only renames the log file on the logging thread,
+    compressing it to `dest` happens in a separate thread. The thread is not a daemon,
+    so the process waits for it before exiting
+    """
+    rotated = dest[: -len(".gz")] if dest.endswith(".gz") else dest + ".rotated"
+    os.rename(source, rotated)
+    threading.Thread(target=_compress, args=(rotated, dest), name="revlibs-logger-gzip").start()
+
+
+def compress_rotated_files(handlers):
+    """
+    Make rotating file handlers gzip their rotated files in the background
+    """
+    for handler in handlers:
+        if isinstance(handler, BaseRotatingHandler):
+            handler.namer = gzip_namer
+            handler.rotator = background_gzip_rotator
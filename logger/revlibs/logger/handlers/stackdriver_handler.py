@@ -0,0 +1,189 @@
+from typing import List, Tuple, Union
+
+import json
+import logging
+import sys
+import threading
+import urllib.request
+from collections import deque
+from urllib.parse import urlparse
+
+from ..formatters.json_formatter import JsonFormatter
+
+# (severity, formatted record). The payload is a dict or a JSON/plain text string
+Entry = Tuple[str, Union[dict, str]]
+
+
+class CloudLoggingTransport:
+    """
+    Sends batches to Google Stackdriver. google-cloud-logging is only imported when this is created
+    """
+
+    def __init__(self, log_name: str = "python", client=None):
+        if client is None:
+            from google.cloud.logging import Client
+
+            client = Client()
+        self.logger = client.logger(log_name)
+
+    def send(self, entries: List[Entry]):
+        batch = self.logger.batch()
+        for severity, payload in entries:
+            if isinstance(payload, str) and payload.startswith("{"):
+                try:
+                    payload = json.loads(payload)
+                except ValueError:
+                    pass
+            if isinstance(payload, dict):
+                batch.log_struct(payload, severity=severity)
+            else:
+                batch.log_text(payload, severity=severity)
+        batch.commit()
+
+
+def _json_line(severity: str, payload: Union[dict, str]) -> str:
+    if isinstance(payload, dict):
+        return json.dumps({"severity": severity, **payload})
+    return payload
+
+
+class FileTransport:
+    """
+    Appends batches to a local file, one JSON line per record. A stand-in for Stackdriver
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def send(self, entries: List[Entry]):
+        with open(self.path, "a") as f:
+            f.writelines(_json_line(severity, payload) + "\n" for severity, payload in entries)
+
+
+class HttpTransport:
+    """
+    POSTs batches as JSON lines to an HTTP endpoint. A stand-in for Stackdriver
+    """
+
+    def __init__(self, url: str, timeout: float = 10.0):
+        self.url = url
+        self.timeout = timeout
+
+    def send(self, entries: List[Entry]):
+        body = "".join(_json_line(severity, payload) + "\n" for severity, payload in entries)
+        request = urllib.request.Request(
+            self.url, data=body.encode("utf-8"), headers={"Content-Type": "application/x-ndjson"}
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            response.read()
+
+
+def make_transport(target: str):
+    """
+    Transport for a STACKDRIVER_TRANSPORT value:
+    `cloud`, `file:///path/to/file` or an `http(s)://` url
+    """
+    if target == "cloud":
+        return CloudLoggingTransport()
+    url = urlparse(target)
+    if url.scheme == "file":
+        return FileTransport(url.path)
+    if url.scheme in ("http", "https"):
+        return HttpTransport(target)
+    raise ValueError(f"Unsupported Stackdriver transport {target}")
+
+
+class StackdriverBatchHandler(logging.Handler):
+    """
+    Formats records on the logging thread and buffers them, as dicts with a `JsonFormatter`,
+    as text otherwise. A background thread sends them
+    to `transport` once `batch_size` records are buffered, or every `flush_interval` seconds.
+    At most `max_buffer` records are kept, the oldest are dropped and counted in `dropped`.
+    """
+
+    def __init__(
+        self,
+        transport,
+        batch_size: int = 500,
+        flush_interval: float = 5.0,
+        max_buffer: int = 10000,
+        close_timeout: float = 10.0,
+    ):
+        super().__init__()
+        self.transport = transport
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.close_timeout = close_timeout
+        #: Records dropped because the buffer was full
+        self.dropped = 0
+        #: Records lost because the transport failed
+        self.failed = 0
+        self._buffer = deque(maxlen=max_buffer)
+        self._wakeup = threading.Condition(threading.Lock())
+        self._send_lock = threading.Lock()
+        self._closed = False
+        self._thread = threading.Thread(
+            target=self._run, name="revlibs-logger-stackdriver", daemon=True
+        )
+        self._thread.start()
+
+    def emit(self, record):
+        try:
+            # Buffer JSON formatted records as dicts, the transports encode them once
+            if isinstance(self.formatter, JsonFormatter):
+                payload = self.formatter.to_json_dict(record)
+            else:
+                payload = self.format(record)
+            entry = (record.levelname, payload)
+        except Exception:
+            self.handleError(record)
+            return
+        with self._wakeup:
+            if len(self._buffer) == self._buffer.maxlen:
+                self.dropped += 1
+            self._buffer.append(entry)
+            if len(self._buffer) >= self.batch_size:
+                self._wakeup.notify()
+
+    def _take(self, count: int) -> List[Entry]:
+        # Called with self._wakeup held
+        return [self._buffer.popleft() for _ in range(min(count, len(self._buffer)))]
+
+    def _send(self, batch: List[Entry]):
+        with self._send_lock:
+            try:
+                self.transport.send(batch)
+            except Exception as e:
+                self.failed += len(batch)
+                sys.stderr.write(f"Could not send {len(batch)} records to Stackdriver: {e!r}\n")
+
+    def _run(self):
+        while True:
+            with self._wakeup:
+                if not self._closed and len(self._buffer) < self.batch_size:
+                    self._wakeup.wait(self.flush_interval)
+                batch = self._take(self.batch_size)
+                closed = self._closed
+            if batch:
+                self._send(batch)
+            elif closed:
+                return
+
+    def flush(self):
+        """
+        Send everything buffered so far, on the calling thread
+        """
+        while True:
+            with self._wakeup:
+                batch = self._take(self.batch_size)
+            if not batch:
+                return
+            self._send(batch)
+
+    def close(self):
+        with self._wakeup:
+            self._closed = True
+            self._wakeup.notify()
+        if self._thread.is_alive():
+            self._thread.join(self.close_timeout)
+        super().close()
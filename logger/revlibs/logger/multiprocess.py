@@ -0,0 +1,100 @@
+"""
+Log aggregation for multiprocessing.
+
+A single listener process owns the handlers configured from logging.yaml (console, file, Stackdriver, ...).
+Every other process only puts its records on a queue, so no two processes write to, or rotate, the same file.
+
+    queue = start_listener()
+    with multiprocessing.Pool(initializer=configure_worker, initargs=(queue,)) as pool:
+        ...
+    stop_listener()
+"""
+from typing import Optional, Union
+
+import atexit
+import logging
+import multiprocessing
+from logging.handlers import QueueHandler
+from os import environ, _Environ
+
+from . import _forward_only, reconfigure, shutdown
+
+_listener = None
+_queue = None
+# Whether this process forwards its records to the listener
+_forwarding = False
+
+
+class _ForwardingHandler(QueueHandler):
+    def enqueue(self, record):
+        # multiprocessing.SimpleQueue has no put_nowait
+        self.queue.put(record)
+
+
+def _listen(queue, params: dict):
+    """
+    Runs in the listener process: hand every forwarded record to the locally configured loggers
+    """
+    # Reading the queue already happens off the workers' logging path.
+    # A forked listener inherits the forwarding configuration, replace it.
+    # Records arrive for the loggers it inherits, they must stay enabled
+    reconfigure(params={**params, "LOG_ASYNC": "FALSE"}, disable_existing_loggers=False)
+    while True:
+        record = queue.get()
+        if record is None:
+            break
+        logging.getLogger(record.name).handle(record)
+    shutdown()
+    logging.shutdown()
+
+
+def configure_worker(queue):
+    """
+    Make this process forward all its records to the listener. Use it as a `multiprocessing.Pool`
+    initializer. Later `get_logger` calls in the process keep forwarding.
+    """
+    _forward_only(_ForwardingHandler(queue))
+
+
+def start_listener(params: Union[dict, _Environ] = None, forward: bool = True):
+    """
+    Start the listener process, configured by `params` like `get_logger`.
+    The current process forwards its records to it as well, unless `forward` is False.
+    Returns the queue to pass to `configure_worker` in the worker processes.
+    The queue is unbounded, a worker only blocks while the pipe to the listener is full.
+    """
+    global _listener, _queue, _forwarding
+
+    if _listener is not None:
+        return _queue
+    # Records are written to the pipe by the logging thread itself, there is no feeder thread
+    # which could lose them when a pool terminates its workers
+    _queue = multiprocessing.SimpleQueue()
+    _listener = multiprocessing.Process(
+        target=_listen, args=(_queue, dict(params or environ)), name="revlibs-logger-listener"
+    )
+    _listener.start()
+    if forward:
+        configure_worker(_queue)
+    _forwarding = forward
+    atexit.unregister(stop_listener)
+    atexit.register(stop_listener)
+    return _queue
+
+
+def stop_listener(timeout: Optional[float] = 30.0):
+    """
+    Write out everything forwarded so far and stop the listener process.
+    If the current process was forwarding, it configures logging locally again
+    on its next `get_logger` call. Registered to run at exit.
+    """
+    global _listener, _queue, _forwarding
+
+    if _listener is None:
+        return
+    if _forwarding:
+        _forward_only(None)
+        _forwarding = False
+    _queue.put(None)
+    _listener.join(timeout)
+    _listener = _queue = None
@@ -1,9 +1,28 @@
+import gzip
+import json
+import logging
+import logging.handlers
+import multiprocessing
 import os
+import shutil
+import subprocess
 import tempfile
 import sys
+import threading
+from pathlib import Path
+from unittest.mock import patch
 
-from revlibs.logger import get_logger
+import pytest
+
+from revlibs.logger import get_logger, reconfigure, shutdown
+from revlibs.logger.filters.rate_limit_filter import RateLimitFilter
+from revlibs.logger.multiprocess import configure_worker, start_listener, stop_listener
+from revlibs.logger.handlers.rotation import compress_rotated_files
+from revlibs.logger.handlers.queue_handler import BoundedQueueHandler
+from revlibs.logger.handlers.stackdriver_handler import StackdriverBatchHandler, make_transport
 from revlibs.logger.formatters.color_formatter import RESET_SEQ
+from revlibs.logger.formatters.json_formatter import JsonFormatter
+from revlibs.logger.formatters.stackdriver_formatter import StackdriverJsonFormatter
 
 
 def test_console_logging(capsys, monkeypatch):
@@ -41,3 +60,377 @@ def test_console_logging(capsys, monkeypatch):
         assert DEBUG_STRING in s, "DEBUG message not written to file"
         assert len(s.split("\n")) == 3, "More lines in log file"
     os.remove(file_name)
+
+
+def test_async_logging():
+    with tempfile.NamedTemporaryFile(delete=False) as f:
+        file_name = f.name
+    params = {"LOG_FILE_LOCATION": file_name, "LOG_ASYNC": "TRUE"}
+    log = get_logger("", params)
+    assert isinstance(log.handlers[0], BoundedQueueHandler), "records are not queued"
+    for i in range(100):
+        log.debug("async message %d", i)
+    shutdown()
+
+    with open(file_name) as f:
+        s = f.read()
+        assert "async message 99" in s, "queued records not written on shutdown"
+        assert len(s.splitlines()) == 100
+    os.remove(file_name)
+
+
+def test_logging_after_shutdown():
+    with tempfile.NamedTemporaryFile(delete=False) as f:
+        file_name = f.name
+    params = {"LOG_FILE_LOCATION": file_name, "LOG_ASYNC": "TRUE", "LOG_QUEUE_SIZE": "5"}
+    log = get_logger("", params)
+    shutdown()
+    assert not any(isinstance(h, BoundedQueueHandler) for h in log.handlers)
+
+    writer = threading.Thread(target=lambda: [log.debug("late %d", i) for i in range(10)])
+    writer.start()
+    writer.join(10)
+    assert not writer.is_alive(), "logging blocked on a queue nobody drains"
+    with open(file_name) as f:
+        assert len(f.read().splitlines()) == 10
+    os.remove(file_name)
+
+
+def _record(level=logging.INFO, msg="m"):
+    return logging.LogRecord("test", level, __file__, 1, msg, None, None)
+
+
+def test_queue_drop_oldest():
+    handler = BoundedQueueHandler(maxsize=2, overflow="drop_oldest")
+    for msg in ("a", "b", "c"):
+        handler.handle(_record(msg=msg))
+    assert handler.dropped == 1
+    assert [handler.queue.get_nowait().msg for _ in range(2)] == ["b", "c"]
+
+
+def test_queue_drop_level():
+    handler = BoundedQueueHandler(maxsize=1, overflow="drop_level", drop_level=logging.INFO)
+    handler.handle(_record(logging.WARNING, "kept"))
+    handler.handle(_record(logging.INFO, "dropped"))
+    assert handler.dropped == 1
+    assert handler.queue.get_nowait().msg == "kept"
+
+
+def test_configuration_cached():
+    with tempfile.NamedTemporaryFile(delete=False) as f:
+        file_name = f.name
+    params = {"LOG_FILE_LOCATION": file_name}
+    log = get_logger("", params)
+    handlers = list(log.handlers)
+
+    assert get_logger("other", dict(params)) is logging.getLogger("other")
+    assert log.handlers == handlers, "handlers rebuilt for identical params"
+    assert params == {"LOG_FILE_LOCATION": file_name}, "params modified"
+
+    reconfigure("", params)
+    assert log.handlers != handlers, "reconfigure did not rebuild handlers"
+    os.remove(file_name)
+
+
+def test_changed_params_keep_earlier_loggers():
+    with tempfile.NamedTemporaryFile(delete=False) as f:
+        file_name = f.name
+    early = get_logger("mod.early", {"LOG_FILE_LOCATION": file_name})
+    get_logger("", {"LOG_FILE_LOCATION": file_name, "LOG_LEVEL_FILE": "INFO"})
+    assert not early.disabled
+    early.warning("still logging")
+    with open(file_name) as f:
+        assert "still logging" in f.read()
+    os.remove(file_name)
+
+
+class ListTransport:
+    def __init__(self):
+        self.batches = []
+
+    def send(self, entries):
+        self.batches.append(entries)
+
+
+def test_stackdriver_batches_by_size():
+    transport = ListTransport()
+    handler = StackdriverBatchHandler(transport, batch_size=10, flush_interval=60)
+    for i in range(25):
+        handler.handle(_record(msg=f"m{i}"))
+    handler.close()
+    assert [len(b) for b in transport.batches] == [10, 10, 5]
+    assert transport.batches[0][0] == ("INFO", "m0")
+
+
+def test_stackdriver_bounded_buffer():
+    transport = ListTransport()
+    handler = StackdriverBatchHandler(transport, batch_size=100, flush_interval=60, max_buffer=3)
+    for i in range(5):
+        handler.handle(_record(msg=f"m{i}"))
+    handler.flush()
+    assert handler.dropped == 2
+    assert [payload for _, payload in transport.batches[0]] == ["m2", "m3", "m4"]
+    handler.close()
+
+
+def test_stackdriver_file_transport():
+    with tempfile.NamedTemporaryFile(delete=False) as f:
+        file_name = f.name
+    handler = StackdriverBatchHandler(make_transport(f"file://{file_name}"), flush_interval=60)
+    handler.handle(_record(msg="to file"))
+    handler.close()
+    with open(file_name) as f:
+        assert f.read() == "to file\n"
+    os.remove(file_name)
+
+
+def test_stackdriver_json_records():
+    with tempfile.NamedTemporaryFile(delete=False) as f:
+        file_name = f.name
+    handler = StackdriverBatchHandler(make_transport(f"file://{file_name}"), flush_interval=60)
+    handler.setFormatter(StackdriverJsonFormatter())
+    record = _record(logging.ERROR, "failed")
+    record.pairs = {(1, 2): "a"}
+    handler.handle(record)
+    handler.close()
+    with open(file_name) as f:
+        line = json.loads(f.read())
+    assert line["severity"] == "ERROR"
+    assert line["text"] == "failed"
+    assert line["extra"] == {"pairs": {"(1, 2)": "a"}}
+    os.remove(file_name)
+
+
+def test_google_cloud_imported_lazily():
+    code = "import sys, revlibs.logger; assert 'google.cloud.logging' not in sys.modules"
+    subprocess.run([sys.executable, "-c", code], check=True)
+
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_json_formatter(use_orjson):
+    formatter = JsonFormatter(keys=["levelname", "lineno"], use_orjson=use_orjson)
+    record = _record(logging.WARNING, "hello %s")
+    record.args = ("world",)
+    record.user_id = 42
+    record.path = Path("/tmp")
+    out = json.loads(formatter.format(record))
+    assert out["text"] == "hello world"
+    assert out["params"] == {"levelname": "WARNING", "lineno": 1}
+    assert out["extra"] == {"user_id": 42, "path": "/tmp"}
+    assert "hostname" in out["environment"]
+
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_json_formatter_unencodable_extra(use_orjson):
+    formatter = JsonFormatter(keys=[], use_orjson=use_orjson)
+    record = _record()
+    record.big = 2 ** 70
+    record.pairs = {(1, 2): "a"}
+    record.loop = []
+    record.loop.append(record.loop)
+    out = json.loads(formatter.format(record))
+    assert out["text"] == "m"
+    assert out["extra"]["big"] == 2 ** 70
+    assert out["extra"]["pairs"] == {"(1, 2)": "a"}
+
+
+def test_json_file_logging():
+    with tempfile.NamedTemporaryFile(delete=False) as f:
+        file_name = f.name
+    log = get_logger("", {"LOG_FILE_LOCATION": file_name, "LOG_FORMAT_FILE": "json"})
+    log.info("json line", extra={"request": "abc"})
+    with open(file_name) as f:
+        line = json.loads(f.read())
+    assert line["text"] == "json line"
+    assert line["extra"] == {"request": "abc"}
+    os.remove(file_name)
+
+
+def test_stackdriver_formatter():
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        record = logging.LogRecord("test", logging.ERROR, __file__, 1, "m", None, sys.exc_info())
+    out = json.loads(StackdriverJsonFormatter().format(record))
+    assert out["params"]["levelname"] == "ERROR"
+    assert "ValueError: boom" in out["params"]["exc_text"]
+
+
+def test_rate_limit_per_call_site():
+    rate_limit = RateLimitFilter(rate=1, burst=2)
+    with patch("time.monotonic", return_value=100.0) as monotonic:
+        records = [_record(msg=f"m{i}") for i in range(5)]
+        assert [rate_limit.filter(r) for r in records] == [True, True, False, False, False]
+        other_site = _record()
+        other_site.lineno = 2
+        assert rate_limit.filter(other_site), "call sites share a bucket"
+
+        monotonic.return_value = 101.1
+        record = _record(msg="later")
+        assert rate_limit.filter(record)
+    assert record.suppressed == 3
+    assert record.getMessage() == "later (suppressed 3 similar)"
+
+
+def test_rate_limit_summary_for_quiet_call_site():
+    rate_limit = RateLimitFilter(rate=1, burst=1, summary_interval=10)
+    handler = logging.handlers.BufferingHandler(100)
+    handler.addFilter(rate_limit)
+    rate_limit.attach(handler)
+    with patch("time.monotonic", return_value=100.0) as monotonic:
+        for i in range(4):
+            handler.handle(_record(logging.WARNING, msg=f"m{i}"))
+        monotonic.return_value = 105.0
+        other_site = _record(msg="other")
+        other_site.lineno = 2
+        handler.handle(other_site)
+        assert len(handler.buffer) == 2, "summary before the interval"
+
+        monotonic.return_value = 111.0
+        later = _record(msg="later")
+        later.lineno = 2
+        handler.handle(later)
+    summary = handler.buffer[-2]
+    assert summary.levelno == logging.WARNING
+    assert summary.suppressed == 3
+    assert summary.getMessage() == "m3 (suppressed 3 similar)"
+    assert handler.buffer[-1] is later
+
+
+def test_rate_limit_flush():
+    rate_limit = RateLimitFilter(dedupe_interval=60)
+    handler = logging.handlers.BufferingHandler(100)
+    handler.addFilter(rate_limit)
+    rate_limit.attach(handler)
+    for _ in range(5):
+        handler.handle(_record(msg="same"))
+    rate_limit.flush()
+    assert [r.getMessage() for r in handler.buffer] == ["same", "same (suppressed 4 similar)"]
+    rate_limit.flush()
+    assert len(handler.buffer) == 2
+
+
+def test_rate_limit_evaluates_record_once():
+    rate_limit = RateLimitFilter(rate=1, burst=1)
+    record = _record()
+    assert rate_limit.filter(record)
+    assert rate_limit.filter(record), "second handler got a different decision"
+
+
+def test_dedupe_and_sampling():
+    dedupe = RateLimitFilter(dedupe_interval=60)
+    assert dedupe.filter(_record(msg="same"))
+    assert not dedupe.filter(_record(msg="same"))
+    assert dedupe.filter(_record(msg="different"))
+
+    sampling = RateLimitFilter(sample="DEBUG=0,INFO=1")
+    assert not sampling.filter(_record(logging.DEBUG))
+    assert sampling.filter(_record(logging.INFO))
+    assert sampling.filter(_record(logging.ERROR))
+
+
+def test_rate_limit_constant_memory():
+    rate_limit = RateLimitFilter(rate=10, dedupe_interval=1, max_keys=10)
+    for i in range(100):
+        record = _record(msg=f"m{i}")
+        record.lineno = i
+        rate_limit.filter(record)
+    assert len(rate_limit._sites) == 10
+    assert len(rate_limit._messages) == 10
+
+
+def test_rate_limit_from_params(capsys):
+    with tempfile.NamedTemporaryFile(delete=False) as f:
+        file_name = f.name
+    log = get_logger("", {"LOG_FILE_LOCATION": file_name, "LOG_DEDUPE_INTERVAL": "60"})
+    for _ in range(10):
+        log.error("flood")
+    assert capsys.readouterr().err.count("flood") == 1
+    with open(file_name) as f:
+        assert f.read().count("flood") == 1
+    os.remove(file_name)
+
+
+def _log_from_worker(i):
+    get_logger(__name__).info("worker message %d", i)
+    return os.getpid()
+
+
+def test_multiprocess_listener():
+    with tempfile.NamedTemporaryFile(delete=False) as f:
+        file_name = f.name
+    queue = start_listener({"LOG_FILE_LOCATION": file_name})
+    with multiprocessing.Pool(2, initializer=configure_worker, initargs=(queue,)) as pool:
+        pids = set(pool.map(_log_from_worker, range(200)))
+    get_logger(__name__).info("parent message")
+    stop_listener()
+
+    assert len(pids) > 1
+    with open(file_name) as f:
+        lines = f.read().splitlines()
+    assert sum("worker message" in line for line in lines) == 200
+    assert all(line.startswith("INFO") for line in lines), "interleaved writes"
+    assert any("parent message" in line for line in lines)
+    os.remove(file_name)
+
+
+def test_stop_listener_keeps_local_handlers():
+    with tempfile.NamedTemporaryFile(delete=False) as f:
+        file_name = f.name
+    with tempfile.NamedTemporaryFile(delete=False) as f:
+        own_file_name = f.name
+    params = {"LOG_FILE_LOCATION": file_name}
+    log = get_logger("app", params)
+    own_handler = logging.FileHandler(own_file_name)
+    log.addHandler(own_handler)
+    root_handlers = list(logging.getLogger().handlers)
+
+    start_listener(params, forward=False)
+    stop_listener()
+    assert logging.getLogger().handlers == root_handlers, "local configuration removed"
+    start_listener(params)
+    stop_listener()
+    assert own_handler in log.handlers, "handler added by the application removed"
+
+    log.removeHandler(own_handler)
+    own_handler.close()
+    os.remove(file_name)
+    os.remove(own_file_name)
+
+
+def _log_from_existing_logger(i):
+    logging.getLogger("revlibs.tests.existing").warning("existing logger message %d", i)
+
+
+def test_multiprocess_listener_keeps_existing_loggers():
+    with tempfile.NamedTemporaryFile(delete=False) as f:
+        file_name = f.name
+    logging.getLogger("revlibs.tests.existing")
+    queue = start_listener({"LOG_FILE_LOCATION": file_name})
+    with multiprocessing.Pool(2, initializer=configure_worker, initargs=(queue,)) as pool:
+        pool.map(_log_from_existing_logger, range(20))
+    stop_listener()
+
+    with open(file_name) as f:
+        lines = f.read().splitlines()
+    assert sum("existing logger message" in line for line in lines) == 20
+    os.remove(file_name)
+
+
+def test_background_gzip_rotation():
+    directory = tempfile.mkdtemp()
+    file_name = os.path.join(directory, "app.log")
+    handler = logging.handlers.RotatingFileHandler(file_name, backupCount=2)
+    compress_rotated_files([handler])
+    handler.handle(_record(msg="before rotation"))
+    handler.doRollover()
+    handler.handle(_record(msg="after rotation"))
+    handler.close()
+    for thread in threading.enumerate():
+        if thread.name == "revlibs-logger-gzip":
+            thread.join()
+
+    assert sorted(os.listdir(directory)) == ["app.log", "app.log.1.gz"]
+    with gzip.open(file_name + ".1.gz", "rt") as f:
+        assert f.read() == "before rotation\n"
+    shutil.rmtree(directory)